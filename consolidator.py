@@ -13,11 +13,25 @@ Requirements:
 """
 
 import pandas as pd
+import csv
 import json
 import os
 import argparse
 from datetime import datetime
 
+def to_number(value):
+    """Convert a CSV cell to int/float where possible so Excel stores it as a number."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+def read_deposits(csv_file):
+    """Read a child's deposit CSV as a list of row dicts (stdlib csv, no DataFrame)."""
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
 def consolidate_deposits(summary_file, base_dir=None, output_excel=None, timestamp=None, username=None):
     """
     Consolidate all deposit information into a single Excel file.
@@ -78,21 +92,21 @@ def consolidate_deposits(summary_file, base_dir=None, output_excel=None, timesta
         
         # Read the child's deposits CSV
         try:
-            deposits_df = pd.read_csv(output_file)
+            deposits = read_deposits(output_file)
             
             # Skip if no deposits
-            if deposits_df.empty:
+            if not deposits:
                 print(f"ℹ️ No deposits found for {child_name} (ID: {child_id})")
                 continue
             
             # Count deposits for this child
-            deposit_count = len(deposits_df)
+            deposit_count = len(deposits)
             children_with_deposits += 1
             
             print(f"✅ Processing {deposit_count} deposits for {child_name} (ID: {child_id})")
             
             # For each deposit, create a row
-            for i, (_, deposit) in enumerate(deposits_df.iterrows(), 1):
+            for i, deposit in enumerate(deposits, 1):
                 # Get deposit amount (try different fields)
                 amount = ""
                 for field in ['formAmount', 'amount']:
@@ -102,7 +116,7 @@ def consolidate_deposits(summary_file, base_dir=None, output_excel=None, timesta
                 
                 # Format amount with currency
                 # currency = deposit.get('currency', '')
-                formatted_amount = amount if amount else 0
+                formatted_amount = to_number(amount) if amount else 0
                 
                 # Get date
                 date = deposit.get('depositDate', '')
@@ -121,7 +135,7 @@ def consolidate_deposits(summary_file, base_dir=None, output_excel=None, timesta
                     'Amount': formatted_amount,
                     'Date': date,
                     'Note': note,
-                    'Is Returned': 'Yes' if deposit.get('hasBeenReturned', False) else 'No',
+                    'Is Returned': 'Yes' if str(deposit.get('hasBeenReturned', '')).lower() == 'true' else 'No',
                     'Refund Status': deposit.get('refundState', ''),
                     'Deposit Status': deposit.get('depositStatus', ''),
                     'Bill Payer': deposit.get('billPayer', '')
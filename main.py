@@ -7,37 +7,54 @@ Uses the exact same logic as the original JavaScript DepositExtractor.
 
 Usage:
     python famly_deposit_extractor.py --username <email> --password <password> --child-id <id> --output <filename.csv>
+    python famly_deposit_extractor.py --username <email> --child-id <id> <id> ... --output <prefix.csv>
 
 Requirements:
-    pip install selenium pandas webdriver-manager tqdm
+    pip install selenium webdriver-manager tqdm
+
+Files:
+    ~/.cache/famly/session.json    Last login session, reused by --resume
+    ~/.cache/famly/profile/        Chrome profile, only with --profile-dir
+
+Environment:
+    FAMLY_CHROMEDRIVER    Path to a chromedriver binary (skips webdriver-manager entirely)
+    CHROMEDRIVER_PATH     Same, checked after FAMLY_CHROMEDRIVER
+    FAMLY_REMOTE_URL      Selenium server to use instead of a local chromedriver, e.g.
+                          docker run -d -p 4444:4444 --shm-size=2g selenium/standalone-chrome
+                          FAMLY_REMOTE_URL=http://localhost:4444/wd/hub
 """
 
 import os
 import sys
-import time
 import csv
 import json
 import argparse
 import logging
+import queue
 from datetime import datetime
 from getpass import getpass
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException, 
-    NoSuchElementException, 
-    ElementClickInterceptedException,
     StaleElementReferenceException,
-    JavascriptException
+    JavascriptException,
+    SessionNotCreatedException
 )
 from webdriver_manager.chrome import ChromeDriverManager
+from urllib3.util.retry import Retry
+try:
+    from selenium.webdriver.remote.client_config import ClientConfig
+except ImportError:  # Selenium < 4.26
+    ClientConfig = None
 
 # Configuration with updated timestamp and user
 CONFIG = {
@@ -48,8 +65,33 @@ CONFIG = {
     "DEFAULT_TIMEOUT": 25,
     "PAGE_LOAD_WAIT": 7,
     "RETRY_ATTEMPTS": 3,
-    "DELAY_BETWEEN_ACTIONS": 1.0,
     "MODAL_LOAD_DELAY": 2.0,
+    "MODAL_WAIT_TIMEOUT": 5,
+    "MODAL_WAIT_POLL": 0.05,
+    "DEPOSITS_FAST_WAIT": 2,
+    "DRIVER_RECYCLE_EVERY": 50,
+    "PROGRESS_LOG_EVERY": 10,
+    "WINDOW_SIZE": "1280,1024",
+    "WINDOW_SIZE_HEADLESS": "800,600",
+    # Requests never needed for reading deposits (stylesheets stay: visibility checks depend on them)
+    "BLOCKED_URLS": [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf",
+        "*google-analytics.com*", "*googletagmanager.com*", "*segment.io*", "*hotjar*", "*intercom*"
+    ],
+    # Injected into every page so modals open and close without transitions
+    "NO_ANIMATIONS_CSS": "*, *::before, *::after { animation-duration: 0s !important; animation-delay: 0s !important; transition-duration: 0s !important; transition-delay: 0s !important; }",
+    "CHROMEDRIVER_ENV": ["FAMLY_CHROMEDRIVER", "CHROMEDRIVER_PATH"],
+    "CHROMEDRIVER_CACHE": os.path.join(os.path.expanduser("~"), ".cache", "famly", "chromedriver"),
+    # Chrome profile kept by --profile-dir, so the main browser's login survives between runs
+    "PROFILE_DIR": os.path.join(os.path.expanduser("~"), ".cache", "famly", "profile"),
+    "PROFILE_LOGIN_CHECK": 3,
+    "REMOTE_URL_ENV": "FAMLY_REMOTE_URL",
+    # HTTP client for the remote WebDriver: each driver is used from one thread, so a single
+    # kept-alive connection (blocking instead of opening throwaway extras) carries every command
+    "REMOTE_HTTP": {"TIMEOUT": 120, "POOL_SIZE": 1, "CONNECT_RETRIES": 2},
+    # Cookies + localStorage of the last login, reused by --resume
+    "SESSION_CACHE": os.path.join(os.path.expanduser("~"), ".cache", "famly", "session.json"),
     "SELECTORS": {
         "LOGIN": {
             "EMAIL_INPUT": 'input[type="email"]',
@@ -64,10 +106,12 @@ CONFIG = {
         "DEPOSITS": {
             "CONTAINERS": [
                 '.sc-beqWaB.sc-eIoBCF.bUiODS.iDrAoK',
-                '[class*="sc-beqWaB"][class*="sc-eIoBCF"]'
+                '[class*="sc-beqWaB"][class*="sc-eIoBCF"]',
+                '.sc-dxnOzg',
+                '.sc-beqWaB.sc-eKNumk.sc-hbpqLB'
             ],
-            "DEPOSIT_TEXT": 'p:contains("Deposit")',
-            "RETURN_TEXT": 'p:contains("Return")',
+            # closest() target for the generic finder
+            "ANCESTOR": '[class*="sc-beqWaB"][class*="sc-eIoBCF"], .sc-dxnOzg',
             "CURRENCY_SYMBOLS": ['€', '$', '£']
         },
         "MODAL": {
@@ -82,7 +126,6 @@ CONFIG = {
                 '#closeModalButton',
                 '.LEGACY_MODAL_closeButton',
                 'button[role="button"]',
-                'button:contains("Close")',
                 '[aria-label="Close"]'
             ],
             "BILL_PAYER": '.Select-value-label',
@@ -91,9 +134,18 @@ CONFIG = {
             "NOTE": 'textarea[name="note"]',
             "ALREADY_PAID": 'input[name="alreadyPaid"]'
         }
+    },
+    # Text matches are not expressible in CSS, so they live here as XPath
+    "XPATHS": {
+        "DEPOSIT_TEXT": '//p[normalize-space(.)="Deposit"]',
+        "RETURN_TEXT": '//p[normalize-space(.)="Return"]',
+        "CLOSE_BUTTON": '//button[normalize-space(.)="Close"]'
     }
 }
 
+# Joined once so the deposit finder runs a single querySelectorAll
+CONFIG["SELECTORS"]["DEPOSITS"]["CONTAINERS_JOINED"] = ", ".join(CONFIG["SELECTORS"]["DEPOSITS"]["CONTAINERS"])
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -105,19 +157,230 @@ logging.basicConfig(
 )
 logger = logging.getLogger("FamlyExtractor")
 
+# Browser-side helpers shared by the modal scripts
+MODAL_JS_HELPERS = """
+    function isVisible(el) {
+        return !!el && el.offsetParent !== null;
+    }
+    
+    // First visible modal container, in selector priority order
+    function findOpenModal(modalSelectors) {
+        for (var i = 0; i < modalSelectors.length; i++) {
+            var modal = document.querySelector(modalSelectors[i]);
+            if (isVisible(modal)) return modal;
+        }
+        return null;
+    }
+    
+    // One combined query (single tree walk), first match per field in document order
+    function readModalFields(root, selectors) {
+        var fields = Object.keys(selectors);
+        var found = {};
+        var combined = fields.map(function(field) { return selectors[field]; }).join(',');
+        root.querySelectorAll(combined).forEach(function(el) {
+            fields.forEach(function(field) {
+                if (!found[field] && el.matches(selectors[field])) found[field] = el;
+            });
+        });
+        
+        return {
+            billPayer: found.billPayer ? found.billPayer.innerText.trim() : null,
+            formAmount: found.formAmount ? found.formAmount.value : null,
+            depositDate: found.depositDate ? found.depositDate.value : null,
+            note: found.note ? found.note.value : null,
+            alreadyPaid: found.alreadyPaid ? found.alreadyPaid.checked : null
+        };
+    }
+    
+    // Click the first visible close button, else dispatch ESC; returns how it closed
+    function closeModal(closeSelectors, closeXPath, modalSelectors) {
+        // Close buttons in priority order, then the text-matched "Close" button
+        var button = null;
+        for (var i = 0; i < closeSelectors.length && !button; i++) {
+            var candidate = document.querySelector(closeSelectors[i]);
+            if (isVisible(candidate)) button = candidate;
+        }
+        if (!button) {
+            var byText = document.evaluate(
+                closeXPath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+            ).singleNodeValue;
+            if (isVisible(byText)) button = byText;
+        }
+        
+        if (button) {
+            button.click();
+            if (!findOpenModal(modalSelectors)) return 'button';
+        } else if (!findOpenModal(modalSelectors)) {
+            return 'none';
+        }
+        
+        // Still open: dispatch ESC where React listens (it bubbles to the root)
+        var target = document.activeElement || document.body;
+        target.dispatchEvent(new KeyboardEvent('keydown', {
+            key: 'Escape', code: 'Escape', keyCode: 27, which: 27, bubbles: true
+        }));
+        return 'escape';
+    }
+"""
+
+
+def deposit_row_selector(index):
+    """CSS selector for the deposit row find_deposits tagged with this index."""
+    return f'[data-deposit-idx="{index}"]'
+
+
+def is_executable(path):
+    """Check that a path points to an executable file."""
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def get_cached_chromedriver():
+    """Return a known-good ChromeDriver path without touching the network, or None."""
+    # Explicit override always wins
+    for env_name in CONFIG["CHROMEDRIVER_ENV"]:
+        env_path = os.environ.get(env_name)
+        if is_executable(env_path):
+            return env_path
+
+    # Path persisted by a previous ChromeDriverManager install
+    try:
+        with open(CONFIG["CHROMEDRIVER_CACHE"], 'r') as f:
+            cached = json.load(f)
+        if is_executable(cached.get("path")):
+            return cached["path"]
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    return None
+
+
+def get_cached_browser_version():
+    """Return the Chrome version the cached ChromeDriver last served, or None."""
+    try:
+        with open(CONFIG["CHROMEDRIVER_CACHE"], 'r') as f:
+            return json.load(f).get("browser_version") or None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def cache_chromedriver(path, browser_version=""):
+    """Persist the resolved ChromeDriver path (and the Chrome version it served)."""
+    try:
+        os.makedirs(os.path.dirname(CONFIG["CHROMEDRIVER_CACHE"]), exist_ok=True)
+        with open(CONFIG["CHROMEDRIVER_CACHE"], 'w') as f:
+            json.dump({"path": path, "browser_version": browser_version}, f)
+    except OSError as e:
+        logger.warning(f"Could not cache ChromeDriver path: {str(e)}")
+
+
+def clear_chromedriver_cache():
+    """Forget the cached ChromeDriver path (e.g. after a Chrome upgrade)."""
+    try:
+        os.remove(CONFIG["CHROMEDRIVER_CACHE"])
+    except OSError:
+        pass
+
+
+def remote_client_config(url):
+    """Selenium HTTP client settings for a remote WebDriver at url."""
+    http = CONFIG["REMOTE_HTTP"]
+    return ClientConfig(
+        remote_server_addr=url,
+        keep_alive=True,
+        timeout=http["TIMEOUT"],
+        # RemoteConnection reads the urllib3.PoolManager arguments from this nested key
+        init_args_for_pool_manager={"init_args_for_pool_manager": {
+            "num_pools": 1,
+            "maxsize": http["POOL_SIZE"],
+            "block": True,
+            # Only failed connects are retried: the command never reached the server
+            "retries": Retry(connect=http["CONNECT_RETRIES"], read=0, redirect=0, backoff_factor=0.1)
+        }}
+    )
+
+
+def load_saved_session():
+    """Return the session saved by the last successful login, or None."""
+    try:
+        with open(CONFIG["SESSION_CACHE"], 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_session(session):
+    """Persist a logged-in session; the file is readable by the current user only."""
+    try:
+        os.makedirs(os.path.dirname(CONFIG["SESSION_CACHE"]), exist_ok=True)
+        fd = os.open(CONFIG["SESSION_CACHE"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(session, f)
+    except OSError as e:
+        logger.warning(f"Could not save session: {str(e)}")
+
+
 class FamlyDepositExtractor:
     """Class for extracting deposit information from Famly system."""
     
-    def __init__(self, headless=False, debug=False):
-        """Initialize the extractor."""
+    def __init__(self, headless=True, debug=False, workers=1, profile_dir=None, remote_url=None):
+        """Initialize the extractor.
+        
+        profile_dir is a Chrome user-data-dir kept between runs; Chrome locks
+        it, so only one browser at a time may use a given directory.
+        remote_url points at a running Selenium server/Grid to use instead of
+        starting a local chromedriver; profile_dir is ignored with it, since
+        the path would be resolved on the remote node.
+        """
         self.headless = headless and not debug
         self.debug = debug
+        self.workers = max(1, workers)
+        if profile_dir and remote_url:
+            logger.warning("Ignoring the Chrome profile directory: it is a local path and the browser runs remotely")
+            profile_dir = None
+        self.profile_dir = profile_dir
+        self.remote_url = remote_url
         if debug:
             logger.setLevel(logging.DEBUG)
         
+        # Resolve per-deposit selectors once instead of on every iteration
+        modal = CONFIG["SELECTORS"]["MODAL"]
+        self._sel_modal_all = modal["CONTAINER"]
+        self._sel_modal_joined = ", ".join(modal["CONTAINER"])
+        self._modal_field_selectors = {
+            "billPayer": modal["BILL_PAYER"],
+            "formAmount": modal["AMOUNT"],
+            "depositDate": modal["DATE"],
+            "note": modal["NOTE"],
+            "alreadyPaid": modal["ALREADY_PAID"]
+        }
+        self._close_selectors = modal["CLOSE_BUTTON"]
+        
+        # Output record with the per-run constants filled in once; also fixes the CSV column order
+        self._record_template = {
+            "index": 0,
+            "amount": "",
+            "currency": "",
+            "depositStatus": "",
+            "hasBeenReturned": False,
+            "returnStatus": "",
+            "billPayer": "",
+            "formAmount": "",
+            "depositDate": "",
+            "note": "",
+            "alreadyPaid": False,
+            "extractedBy": CONFIG["USER"],
+            "extractedAt": CONFIG["TIMESTAMP"],
+            "errorMessage": ""
+        }
+        
         self.driver = None
+        self.child_id = None
+        self._credentials = None
+        self._browser_pool = None
         self.deposits = []
-        self.extracted_data = []
+        self._csv_file = None
+        self._csv_writer = None
+        self.exported_count = 0
         self.setup_driver()
     
     def setup_driver(self):
@@ -128,36 +391,112 @@ class FamlyDepositExtractor:
         if self.headless:
             chrome_options.add_argument("--headless=new")
         
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-gpu")
+        # Compact viewport - the deposit list renders fine without desktop width
+        window_size = CONFIG["WINDOW_SIZE_HEADLESS"] if self.headless else CONFIG["WINDOW_SIZE"]
+        chrome_options.add_argument(f"--window-size={window_size}")
+        # Background services and first-run UI only cost startup time
+        for flag in ("--disable-extensions", "--disable-background-networking", "--disable-sync",
+                     "--disable-translate", "--mute-audio", "--no-first-run"):
+            chrome_options.add_argument(flag)
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
         
-        # Enable JavaScript
+        # Enable JavaScript, skip images (nothing is read from them)
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
         chrome_options.add_experimental_option("prefs", {
-            "profile.default_content_setting_values.javascript": 1
+            "profile.default_content_setting_values.javascript": 1,
+            "profile.managed_default_content_settings.images": 2
         })
         
+        # Return from driver.get() at DOMContentLoaded; readiness is checked explicitly
+        chrome_options.page_load_strategy = "eager"
+        
+        # A stray alert/confirm must not block every following command
+        chrome_options.set_capability("unhandledPromptBehavior", "dismiss")
+        
         # Disable animations for better stability
         chrome_options.add_argument("--disable-animations")
         
+        if self.profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={self.profile_dir}")
+            chrome_options.add_argument("--profile-directory=Default")
+        
         if self.debug:
             chrome_options.add_argument("--auto-open-devtools-for-tabs")
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.driver.maximize_window()
+        if self.remote_url:
+            # Long-lived Selenium node: nothing to resolve or spawn locally
+            if ClientConfig:
+                self.driver = webdriver.Remote(
+                    command_executor=self.remote_url, options=chrome_options,
+                    client_config=remote_client_config(self.remote_url)
+                )
+            else:
+                self.driver = webdriver.Remote(command_executor=self.remote_url, options=chrome_options)
+            logger.debug(f"Using remote WebDriver at {self.remote_url}")
+        else:
+            self.driver = self._start_local_chrome(chrome_options)
+        
+        # Explicit waits only: a missing optional element must not block on an implicit wait
+        self.driver.implicitly_wait(0)
+        
+        if hasattr(self.driver, "execute_cdp_cmd"):
+            self._apply_cdp_tweaks()
+        else:
+            logger.warning("CDP is not available on the remote WebDriver: assets are not blocked and animations stay on")
         
         # Define wait strategy
         self.wait = WebDriverWait(self.driver, CONFIG["DEFAULT_TIMEOUT"])
+        self._modal_wait = WebDriverWait(
+            self.driver, CONFIG["MODAL_WAIT_TIMEOUT"], poll_frequency=CONFIG["MODAL_WAIT_POLL"]
+        )
         
         logger.info("WebDriver setup complete")
     
+    def _apply_cdp_tweaks(self):
+        """Block unneeded requests and disable animations through the DevTools protocol."""
+        # Skip images, fonts and analytics at the network layer
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": CONFIG["BLOCKED_URLS"]})
+        except Exception as e:
+            logger.warning(f"Could not block asset requests: {str(e)}")
+        
+        # Kill CSS animations/transitions on every document the app loads
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": """
+                document.addEventListener('DOMContentLoaded', function() {
+                    var style = document.createElement('style');
+                    style.textContent = %s;
+                    document.head.appendChild(style);
+                });
+            """ % json.dumps(CONFIG["NO_ANIMATIONS_CSS"])})
+        except Exception as e:
+            logger.warning(f"Could not install animation-disabling stylesheet: {str(e)}")
+    
+    def is_logged_in(self, timeout):
+        """Open the login route and report whether the app redirects away from it within timeout."""
+        # A logged-in app navigates away from the login route by itself
+        self.driver.get(CONFIG["BASE_URL"])
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                lambda driver: "login" not in driver.current_url.lower()
+            )
+            return True
+        except TimeoutException:
+            return False
+    
     def login(self, username, password):
         """Log in to the Famly system."""
         logger.info("Logging in to Famly...")
         
+        # A persistent profile usually still holds a valid session
+        if self.profile_dir and self.is_logged_in(CONFIG["PROFILE_LOGIN_CHECK"]):
+            logger.info("Already logged in (persistent profile)")
+            self._credentials = (username, password)
+            return True
+        
         try:
             # Navigate to login page
             self.driver.get(CONFIG["BASE_URL"])
@@ -187,15 +526,18 @@ class FamlyDepositExtractor:
             self.wait.until(EC.url_changes(CONFIG["BASE_URL"]))
             
             # Additional verification
-            timeout = time.time() + CONFIG["DEFAULT_TIMEOUT"]
-            while time.time() < timeout:
-                if "login" not in self.driver.current_url.lower():
-                    logger.info("Login successful")
-                    return True
-                time.sleep(0.5)
-            
-            logger.error("Login failed: Still on login page after timeout")
-            return False
+            try:
+                WebDriverWait(self.driver, CONFIG["DEFAULT_TIMEOUT"], poll_frequency=0.2).until(
+                    lambda driver: "login" not in driver.current_url.lower()
+                )
+            except TimeoutException:
+                logger.error("Login failed: Still on login page after timeout")
+                return False
+            
+            logger.info("Login successful")
+            # Kept so parallel workers can open their own sessions
+            self._credentials = (username, password)
+            return True
             
         except TimeoutException:
             logger.error("Login failed: Timeout waiting for elements")
@@ -204,6 +546,82 @@ class FamlyDepositExtractor:
             logger.error(f"Login failed: {str(e)}")
             return False
     
+    def export_session(self):
+        """Capture the logged-in session (cookies and localStorage) for reuse in another driver."""
+        return {
+            "cookies": self.driver.get_cookies(),
+            "local_storage": self.driver.execute_script(
+                "return Object.assign({}, window.localStorage);"
+            )
+        }
+    
+    def restore_session(self, session):
+        """Load a session captured by export_session into this driver and reload the app with it."""
+        try:
+            # Cookies can only be set for the domain that is currently loaded
+            self.driver.get(CONFIG["BASE_URL"])
+            for cookie in session["cookies"]:
+                self.driver.add_cookie(cookie)
+            self.driver.execute_script("""
+                var items = arguments[0];
+                Object.keys(items).forEach(function(key) {
+                    window.localStorage.setItem(key, items[key]);
+                });
+            """, session["local_storage"])
+            # Routes are hash changes that do not restart the app, so reload for it to pick up the session
+            self.driver.refresh()
+            return True
+        except Exception as e:
+            logger.warning(f"Could not restore session: {str(e)}")
+            return False
+    
+    def _start_local_chrome(self, chrome_options):
+        """Start Chrome with a local chromedriver, preferring the cached binary."""
+        # Use the cached driver first so warm starts never hit the network
+        driver_path = get_cached_chromedriver()
+        # Pin the Chrome version seen last time so the reinstall skips the version lookup
+        driver_version = get_cached_browser_version()
+        if driver_path:
+            try:
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+                logger.debug(f"Using cached ChromeDriver: {driver_path}")
+                return driver
+            except SessionNotCreatedException as e:
+                logger.warning(f"Cached ChromeDriver rejected by Chrome, reinstalling: {str(e)}")
+                clear_chromedriver_cache()
+                # Chrome was upgraded, so the pinned version is stale too
+                driver_version = None
+        
+        try:
+            driver_path = ChromeDriverManager(driver_version=driver_version).install()
+        except Exception as e:
+            # Offline or rate-limited: let Selenium find a chromedriver on PATH (or via Selenium Manager)
+            logger.warning(f"ChromeDriverManager failed, falling back to PATH discovery: {str(e)}")
+            return webdriver.Chrome(options=chrome_options)
+        
+        driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        cache_chromedriver(driver_path, driver.capabilities.get("browserVersion", ""))
+        return driver
+    
+    def login_or_resume(self, username, password, resume=False):
+        """Log in, reusing the session saved on disk first when resuming.
+        
+        Every fresh login is saved so the next --resume run can skip the form.
+        """
+        session = load_saved_session() if resume else None
+        if session and self.restore_session(session):
+            if self.is_logged_in(CONFIG["PAGE_LOAD_WAIT"]):
+                logger.info("Reusing saved login session")
+                self._credentials = (username, password)
+                return True
+            logger.info("Saved session has expired, logging in again")
+        
+        if not self.login(username, password):
+            return False
+        
+        save_session(self.export_session())
+        return True
+    
     def navigate_to_child_profile(self, child_id):
         """Navigate to the specified child's profile page."""
         logger.info(f"Navigating to child profile with ID: {child_id}...")
@@ -215,10 +633,19 @@ class FamlyDepositExtractor:
             
             # Navigate to the URL
             self.driver.get(url)
+            self.child_id = child_id
             
-            # Wait for the page to load
-            logger.info(f"Waiting {CONFIG['PAGE_LOAD_WAIT']} seconds for initial page load...")
-            time.sleep(CONFIG["PAGE_LOAD_WAIT"])
+            # Wait until a deposit row has rendered (children without deposits wait the full PAGE_LOAD_WAIT)
+            try:
+                WebDriverWait(self.driver, CONFIG["PAGE_LOAD_WAIT"], poll_frequency=0.2).until(
+                    lambda driver: driver.execute_script(
+                        "return document.evaluate(arguments[0], document, null,"
+                        " XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;",
+                        CONFIG["XPATHS"]["DEPOSIT_TEXT"]
+                    )
+                )
+            except TimeoutException:
+                logger.info(f"No deposit rendered within {CONFIG['PAGE_LOAD_WAIT']} seconds")
             
             # Verify page loaded by checking for specific elements
             page_loaded = False
@@ -235,9 +662,6 @@ class FamlyDepositExtractor:
             if not page_loaded:
                 logger.warning("Could not confirm page load with selectors. Will continue anyway.")
             
-            # Additional wait for dynamic content
-            time.sleep(CONFIG["DELAY_BETWEEN_ACTIONS"])
-            
             return True
             
         except Exception as e:
@@ -247,22 +671,15 @@ class FamlyDepositExtractor:
     def is_page_fully_loaded(self):
         """Check if the page is fully loaded."""
         try:
-            # Check if document.readyState is complete
-            ready_state = self.driver.execute_script("return document.readyState")
-            
-            # Check if jQuery is active (if present)
-            jquery_active = self.driver.execute_script(
-                "return typeof jQuery !== 'undefined' ? jQuery.active === 0 : true"
-            )
-            
-            # Check if there are no active AJAX requests
-            ajax_complete = self.driver.execute_script(
-                "return typeof window.performance !== 'undefined' && "
-                "typeof window.performance.getEntriesByType !== 'undefined' ? "
-                "window.performance.getEntriesByType('resource').every(r => r.responseEnd > 0) : true"
-            )
-            
-            return ready_state == "complete" and jquery_active and ajax_complete
+            # readyState, jQuery activity (if present) and pending requests in one round trip
+            return self.driver.execute_script("""
+                var readyState = document.readyState === 'complete';
+                var jqueryIdle = typeof jQuery !== 'undefined' ? jQuery.active === 0 : true;
+                var ajaxComplete = typeof window.performance !== 'undefined' &&
+                    typeof window.performance.getEntriesByType !== 'undefined' ?
+                    window.performance.getEntriesByType('resource').every(function(r) { return r.responseEnd > 0; }) : true;
+                return readyState && jqueryIdle && ajaxComplete;
+            """)
         except Exception as e:
             logger.warning(f"Error checking page load status: {str(e)}")
             return False
@@ -271,18 +688,27 @@ class FamlyDepositExtractor:
         """Find all deposits on the page using exact original DepositExtractor logic."""
         logger.info("Finding deposits using original DepositExtractor logic...")
         
-        # Make sure page is fully loaded
-        max_wait = time.time() + 20
-        while not self.is_page_fully_loaded() and time.time() < max_wait:
+        # Fast path: deposit containers are often already rendered
+        try:
+            WebDriverWait(self.driver, CONFIG["DEPOSITS_FAST_WAIT"]).until(EC.presence_of_element_located(
+                (By.CSS_SELECTOR, CONFIG["SELECTORS"]["DEPOSITS"]["CONTAINERS_JOINED"])
+            ))
+            logger.debug("Deposit containers present, skipping page load polling")
+        except TimeoutException:
+            # Slow path: make sure page is fully loaded
             logger.info("Waiting for page to fully load...")
-            time.sleep(1)
-        
-        # Additional safety delay
-        time.sleep(3)
+            try:
+                WebDriverWait(self.driver, 20, poll_frequency=0.25).until(lambda driver: self.is_page_fully_loaded())
+            except TimeoutException:
+                logger.warning("Page still loading after 20 seconds, searching anyway")
         
         # Inject the exact original DepositExtractor code
         try:
             script = """
+            // Deposit selectors come from the Python CONFIG
+            const depositsConfig = arguments[0];
+            const includeDebug = arguments[1];
+            
             // Execute the original DepositExtractor logic
             const extractorResult = (function() {
                 'use strict';
@@ -290,18 +716,17 @@ class FamlyDepositExtractor:
                 // Configuration settings - directly from the original code
                 const CONFIG = {
                     SELECTORS: {
-                        DEPOSITS: {
-                            CONTAINERS: [
-                                '.sc-beqWaB.sc-eIoBCF.bUiODS.iDrAoK',
-                                '[class*="sc-beqWaB"][class*="sc-eIoBCF"]',
-                                '.sc-dxnOzg',
-                                '.sc-beqWaB.sc-eKNumk.sc-hbpqLB'
-                            ],
-                            CURRENCY_SYMBOLS: ['€', '$', '£']
-                        }
+                        DEPOSITS: depositsConfig
                     }
                 };
                 
+                // Amount patterns built once from the configured currency symbols
+                const CURRENCY_CLASS = CONFIG.SELECTORS.DEPOSITS.CURRENCY_SYMBOLS
+                    .map(symbol => symbol.replace(/[\\\\\\]^-]/g, '\\\\$&'))
+                    .join('');
+                const AMOUNT_ONLY = /[\\d,.]+/;
+                const AMOUNT_WITH_CURRENCY = new RegExp('^([' + CURRENCY_CLASS + ']?)\\\\s*([\\\\d,.]+)$');
+                
                 // Utility functions - directly from original code
                 const DOMUtils = {
                     querySelector: function(selector, root = document) {
@@ -350,8 +775,7 @@ class FamlyDepositExtractor:
                 // Find deposit containers - exactly as in the original code
                 function findDepositContainers() {
                     // Try direct selectors first
-                    const containerSelectors = CONFIG.SELECTORS.DEPOSITS.CONTAINERS.join(', ');
-                    let containers = DOMUtils.querySelectorAll(containerSelectors);
+                    let containers = DOMUtils.querySelectorAll(CONFIG.SELECTORS.DEPOSITS.CONTAINERS_JOINED);
                     
                     console.log(`Found ${containers.length} potential containers with direct selectors`);
                     
@@ -378,22 +802,30 @@ class FamlyDepositExtractor:
                     
                     const containers = [];
                     
+                    // Container must have both deposit text and amount info
+                    const isDepositContainer = el => {
+                        const text = el.textContent;
+                        const hasDeposit = text.includes('Deposit');
+                        const hasAmount = CONFIG.SELECTORS.DEPOSITS.CURRENCY_SYMBOLS.some(
+                            symbol => text.includes(symbol)
+                        );
+                        const hasNumbers = /\\d+\\.\\d+|\\d+,\\d+/.test(text);
+                        
+                        return hasDeposit && (hasAmount || hasNumbers);
+                    };
+                    
                     // For each deposit text, find its container
                     for (const depositText of depositTexts) {
-                        const container = DOMUtils.findAncestor(
-                            depositText,
-                            el => {
-                                // Container must have both deposit text and amount info
-                                const hasDeposit = DOMUtils.elementContainsText(el, 'Deposit');
-                                const hasAmount = CONFIG.SELECTORS.DEPOSITS.CURRENCY_SYMBOLS.some(
-                                    symbol => DOMUtils.elementContainsText(el, symbol)
-                                );
-                                const hasNumbers = /\\d+\\.\\d+|\\d+,\\d+/.test(el.textContent);
-                                
-                                return hasDeposit && (hasAmount || hasNumbers);
-                            },
-                            8 // Check up to 8 levels up
-                        );
+                        // Native closest() lookup first, validated with a single text read
+                        let container = depositText.closest(CONFIG.SELECTORS.DEPOSITS.ANCESTOR);
+                        if (container && !isDepositContainer(container)) {
+                            container = null;
+                        }
+                        
+                        // Unknown markup: fall back to walking up to 8 levels
+                        if (!container) {
+                            container = DOMUtils.findAncestor(depositText, isDepositContainer, 8);
+                        }
                         
                         if (container && !containers.includes(container)) {
                             containers.push(container);
@@ -407,7 +839,6 @@ class FamlyDepositExtractor:
                 // Extract deposit information - exactly as in the original code
                 function extractDepositInfo(container, index) {
                     const paragraphs = DOMUtils.querySelectorAll('p', container);
-                    const smallElements = DOMUtils.querySelectorAll('small', container);
                     
                     // Check for Return text
                     const hasBeenReturned = paragraphs.some(p => p.textContent.trim() === 'Return') || 
@@ -427,7 +858,7 @@ class FamlyDepositExtractor:
                             const currencyIndex = paragraphs.indexOf(currencyParagraph);
                             if (currencyIndex >= 0 && currencyIndex < paragraphs.length - 1) {
                                 const nextParagraph = paragraphs[currencyIndex + 1];
-                                if (/[\\d,.]+/.test(nextParagraph.textContent.trim())) {
+                                if (AMOUNT_ONLY.test(nextParagraph.textContent.trim())) {
                                     amount = nextParagraph.textContent.trim();
                                     break;
                                 }
@@ -438,12 +869,12 @@ class FamlyDepositExtractor:
                     // If not found, look for combined format
                     if (!amount) {
                         const amountParagraph = paragraphs.find(p => 
-                            /^[€$£]?\\s*[\\d,.]+$/.test(p.textContent.trim())
+                            AMOUNT_WITH_CURRENCY.test(p.textContent.trim())
                         );
                         
                         if (amountParagraph) {
                             const text = amountParagraph.textContent.trim();
-                            const match = text.match(/^([€$£]?)\\s*([\\d,.]+)$/);
+                            const match = text.match(AMOUNT_WITH_CURRENCY);
                             if (match) {
                                 currency = match[1] || '';
                                 amount = match[2] || text;
@@ -482,27 +913,8 @@ class FamlyDepositExtractor:
                         }
                     }
                     
-                    // Generate XPath for the element for easier identification later
-                    function getXPath(element) {
-                        if (element.id !== '')
-                            return `//*[@id="${element.id}"]`;
-                        
-                        if (element === document.body)
-                            return '/html/body';
-                        
-                        let ix = 0;
-                        const siblings = element.parentNode.childNodes;
-                        
-                        for (let i = 0; i < siblings.length; i++) {
-                            const sibling = siblings[i];
-                            
-                            if (sibling === element)
-                                return getXPath(element.parentNode) + '/' + element.tagName.toLowerCase() + '[' + (ix + 1) + ']';
-                            
-                            if (sibling.nodeType === 1 && sibling.tagName === element.tagName)
-                                ix++;
-                        }
-                    }
+                    // Tag the row so it can be found again with a cheap attribute selector
+                    container.setAttribute('data-deposit-idx', String(index));
                     
                     return {
                         index,
@@ -512,8 +924,8 @@ class FamlyDepositExtractor:
                         depositStatus,
                         hasBeenReturned,
                         returnStatus,
-                        xpath: getXPath(container),
-                        outerHTML: container.outerHTML.substring(0, 500) // For debugging
+                        // Serializing markup is only worth it when debugging
+                        outerHTML: includeDebug ? container.outerHTML.substring(0, 500) : undefined
                     };
                 }
                 
@@ -531,7 +943,6 @@ class FamlyDepositExtractor:
                     // Capture page info for debugging
                     const pageTitle = document.title;
                     const url = window.location.href;
-                    const pageContent = document.body.textContent;
                     const depositParas = document.querySelectorAll('p');
                     console.log(`Page title: ${pageTitle}`);
                     console.log(`URL: ${url}`);
@@ -570,7 +981,7 @@ class FamlyDepositExtractor:
             """
             
             # Execute the script
-            result = self.driver.execute_script(script)
+            result = self.driver.execute_script(script, CONFIG["SELECTORS"]["DEPOSITS"], self.debug)
             
             if result.get('success'):
                 deposits = result.get('deposits', [])
@@ -594,181 +1005,273 @@ class FamlyDepositExtractor:
             logger.error(f"Error running JavaScript deposit finder: {str(e)}")
             return []
     
+    def _extract_modal_js(self):
+        """Read every modal form field in a single script call (None for missing fields).
+        
+        Fields are looked up inside the open modal only, falling back to the
+        whole document when no modal container is visible. All field
+        selectors are matched in one querySelectorAll pass.
+        """
+        return self.driver.execute_script(MODAL_JS_HELPERS + """
+            return readModalFields(findOpenModal(arguments[1]) || document, arguments[0]);
+        """, self._modal_field_selectors, self._sel_modal_all)
+    
+    def _close_modal_js(self):
+        """Close the open modal in a single script call.
+        
+        Returns 'button' if a close button was clicked, 'escape' if an ESC
+        keydown had to be dispatched, or 'none' if no modal was open.
+        """
+        return self.driver.execute_script(MODAL_JS_HELPERS + """
+            return closeModal(arguments[0], arguments[1], arguments[2]);
+        """, self._close_selectors, CONFIG["XPATHS"]["CLOSE_BUTTON"], self._sel_modal_all)
+    
+    def _is_modal_open(self):
+        """Return True if any modal container is visible (one script call per check)."""
+        return self.driver.execute_script(MODAL_JS_HELPERS + """
+            return findOpenModal(arguments[0]) !== null;
+        """, self._sel_modal_all)
+    
+    def _extract_modal_async(self, deposit):
+        """Open, read and close a deposit's modal in one async script call.
+        
+        A modal still open from the previous deposit is closed first, so it
+        cannot be mistaken for this row's. The row is then clicked in the
+        page and a MutationObserver waits for the modal (up to
+        MODAL_LOAD_DELAY) before its fields are read. The modal is then
+        closed and the script only returns once it is gone (again bounded by
+        MODAL_LOAD_DELAY). Returns a dict whose 'status' is 'ok' (with
+        'values', 'closedWith' and 'closed'), 'no_row', 'stale_modal' or 'timeout'.
+        """
+        return self.driver.execute_async_script(MODAL_JS_HELPERS + """
+            var rowSelector = arguments[0];
+            var selectors = arguments[1];
+            var modalSelectors = arguments[2];
+            var closeSelectors = arguments[3];
+            var closeXPath = arguments[4];
+            var timeoutMs = arguments[5];
+            var done = arguments[arguments.length - 1];
+            
+            var row = document.querySelector(rowSelector);
+            if (!row) {
+                done({status: 'no_row'});
+                return;
+            }
+            
+            var finished = false;
+            var observer = null;
+            var timer = null;
+            
+            function finish(modal) {
+                if (finished) return;
+                finished = true;
+                observer.disconnect();
+                clearTimeout(timer);
+                
+                var values = readModalFields(modal, selectors);
+                var closedWith = closeModal(closeSelectors, closeXPath, modalSelectors);
+                waitForClose(function(closed) {
+                    done({status: 'ok', values: values, closedWith: closedWith, closed: closed});
+                });
+            }
+            
+            // Resolve once no modal container is visible any more
+            function waitForClose(callback) {
+                if (!findOpenModal(modalSelectors)) {
+                    callback(true);
+                    return;
+                }
+                var closeTimer = null;
+                var closeObserver = new MutationObserver(function() {
+                    if (findOpenModal(modalSelectors)) return;
+                    closeObserver.disconnect();
+                    clearTimeout(closeTimer);
+                    callback(true);
+                });
+                closeObserver.observe(document.body, {childList: true, subtree: true, attributes: true});
+                closeTimer = setTimeout(function() {
+                    closeObserver.disconnect();
+                    callback(false);
+                }, timeoutMs);
+            }
+            
+            // The modal counts as rendered once its amount input exists
+            function check() {
+                var modal = findOpenModal(modalSelectors);
+                if (modal && modal.querySelector(selectors.formAmount)) finish(modal);
+            }
+            
+            function openRow() {
+                observer = new MutationObserver(check);
+                observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+                timer = setTimeout(function() {
+                    if (finished) return;
+                    // Read whatever modal is open, even without an amount field
+                    var modal = findOpenModal(modalSelectors);
+                    if (modal) {
+                        finish(modal);
+                    } else {
+                        finished = true;
+                        observer.disconnect();
+                        done({status: 'timeout'});
+                    }
+                }, timeoutMs);
+                
+                row.click();
+                check();
+            }
+            
+            // A modal left open by the previous deposit would satisfy check() before this row's renders
+            if (findOpenModal(modalSelectors)) {
+                closeModal(closeSelectors, closeXPath, modalSelectors);
+                waitForClose(function(closed) {
+                    if (closed) {
+                        openRow();
+                    } else {
+                        done({status: 'stale_modal'});
+                    }
+                });
+            } else {
+                openRow();
+            }
+        """, deposit_row_selector(deposit["index"]), self._modal_field_selectors, self._sel_modal_all,
+            self._close_selectors, CONFIG["XPATHS"]["CLOSE_BUTTON"], CONFIG["MODAL_LOAD_DELAY"] * 1000)
+    
+    def _apply_modal_values(self, detailed_deposit, modal_values):
+        """Copy the fields read from a modal into the output record, skipping missing ones."""
+        for field, value in modal_values.items():
+            if value is None:
+                logger.debug(f"Modal field '{field}' not found for deposit #{detailed_deposit['index']}")
+            else:
+                detailed_deposit[field] = value
+    
+    def _new_detailed_deposit(self, deposit):
+        """Build the output record for a deposit with empty modal fields."""
+        detailed_deposit = dict(self._record_template)
+        detailed_deposit.update(
+            index=deposit["index"],
+            amount=deposit.get("amount", "").replace(",", ""),
+            currency=deposit.get("currency", ""),
+            depositStatus=deposit.get("depositStatus", ""),
+            hasBeenReturned=deposit.get("hasBeenReturned", False),
+            returnStatus=deposit.get("returnStatus", "")
+        )
+        return detailed_deposit
+    
     def extract_deposit_details(self, deposit):
         """Extract detailed information for a single deposit."""
         logger.debug(f"Extracting details for deposit #{deposit['index']}: {deposit.get('currency', '')}{deposit.get('amount', '')}")
         
-        detailed_deposit = {
-            "index": deposit["index"],
-            "amount": deposit.get("amount", "").replace(",", ""),
-            "currency": deposit.get("currency", ""),
-            "depositStatus": deposit.get("depositStatus", ""),
-            "hasBeenReturned": deposit.get("hasBeenReturned", False),
-            "returnStatus": deposit.get("returnStatus", ""),
-            "billPayer": "",
-            "formAmount": "",
-            "depositDate": "",
-            "note": "",
-            "alreadyPaid": False,
-            "extractedBy": CONFIG["USER"],
-            "extractedAt": CONFIG["TIMESTAMP"],
-            "errorMessage": ""
-        }
+        detailed_deposit = self._new_detailed_deposit(deposit)
         
+        # Fast path: click, wait, read and close inside the browser in one call
         try:
-            # Try to locate element using XPath if available
-            if "xpath" in deposit and deposit["xpath"]:
+            result = self._extract_modal_async(deposit)
+        except (JavascriptException, TimeoutException) as e:
+            result = {"status": f"error: {str(e)}"}
+        
+        if result.get("status") == "ok":
+            self._apply_modal_values(detailed_deposit, result["values"])
+            logger.debug(f"Closed modal for deposit #{deposit['index']} with {result['closedWith']}")
+            if not result["closed"]:
+                logger.debug(f"Modal still visible after closing deposit #{deposit['index']}")
+            return detailed_deposit
+        
+        if result.get("status") == "stale_modal":
+            # Clicking now would read the previous deposit's modal; leave the row for --resume
+            logger.warning(f"Previous modal would not close, skipping deposit #{deposit['index']}")
+            detailed_deposit["errorMessage"] = "Previous modal did not close"
+            return detailed_deposit
+        
+        logger.debug(f"Modal script for deposit #{deposit['index']} returned {result.get('status')}, retrying step by step")
+        
+        try:
+            # Locate the row by the attribute find_deposits tagged it with
+            clicked = False
+            elements = self.driver.find_elements(By.CSS_SELECTOR, deposit_row_selector(deposit["index"]))
+            if elements:
+                logger.debug(f"Found row element for deposit #{deposit['index']}")
                 try:
-                    element = self.driver.find_element(By.XPATH, deposit["xpath"])
-                    logger.debug(f"Found element using XPath for deposit #{deposit['index']}")
-                    self.driver.execute_script("arguments[0].click();", element)
-                except Exception as e:
-                    logger.warning(f"Failed to find element using XPath: {str(e)}")
-                    # Try an alternative click method directly in JavaScript
-                    clicked = self.driver.execute_script("""
-                        var depositInfo = arguments[0];
-                        
-                        // Helper to find deposit elements
-                        function findDepositElements() {
-                            return Array.from(document.querySelectorAll('p'))
-                                .filter(p => p.textContent.trim() === 'Deposit')
-                                .map(p => {
-                                    // Find container
-                                    let container = p;
-                                    for (let i = 0; i < 5; i++) {
-                                        if (!container.parentElement) break;
-                                        container = container.parentElement;
-                                        
-                                        if (container.textContent.includes(depositInfo.amount)) {
-                                            return container;
-                                        }
+                    self.driver.execute_script("arguments[0].click();", elements[0])
+                    clicked = True
+                except (StaleElementReferenceException, JavascriptException) as e:
+                    logger.warning(f"Failed to click row element: {str(e)}")
+            else:
+                logger.warning(f"No row element tagged for deposit #{deposit['index']}")
+            
+            if not clicked:
+                # Try an alternative click method directly in JavaScript
+                clicked = self.driver.execute_script("""
+                    var depositInfo = arguments[0];
+                    
+                    // Helper to find deposit elements
+                    function findDepositElements() {
+                        return Array.from(document.querySelectorAll('p'))
+                            .filter(p => p.textContent.trim() === 'Deposit')
+                            .map(p => {
+                                // Find container
+                                let container = p;
+                                for (let i = 0; i < 5; i++) {
+                                    if (!container.parentElement) break;
+                                    container = container.parentElement;
+                                    
+                                    if (container.textContent.includes(depositInfo.amount)) {
+                                        return container;
                                     }
-                                    return null;
-                                })
-                                .filter(el => el !== null);
-                        }
-                        
-                        // Find deposits
-                        var depositElements = findDepositElements();
-                        console.log("Found " + depositElements.length + " deposit elements");
-                        
-                        // Click the deposit at index
-                        if (depositElements.length >= depositInfo.index) {
-                            var targetElement = depositElements[depositInfo.index - 1];
-                            targetElement.click();
-                            return true;
-                        }
-                        
-                        return false;
-                    """, deposit)
+                                }
+                                return null;
+                            })
+                            .filter(el => el !== null);
+                    }
                     
-                    if not clicked:
-                        raise Exception("Could not click deposit with alternative method")
-            
+                    // Find deposits
+                    var depositElements = findDepositElements();
+                    console.log("Found " + depositElements.length + " deposit elements");
+                    
+                    // Click the deposit at index
+                    if (depositElements.length >= depositInfo.index) {
+                        var targetElement = depositElements[depositInfo.index - 1];
+                        targetElement.click();
+                        return true;
+                    }
+                    
+                    return false;
+                """, deposit)
+                
+                if not clicked:
+                    raise Exception("Could not click deposit with alternative method")
+        
             logger.debug(f"Clicked on deposit #{deposit['index']}")
             
-            # Wait for modal to appear
-            time.sleep(CONFIG["MODAL_LOAD_DELAY"])
-            
-            # Check for modal presence
-            modal_found = False
-            for selector in CONFIG["SELECTORS"]["MODAL"]["CONTAINER"]:
-                try:
-                    modal = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if modal.is_displayed():
-                        modal_found = True
-                        logger.debug(f"Modal found with selector: {selector}")
-                        break
-                except NoSuchElementException:
-                    continue
-            
-            if not modal_found:
+            # Wait for any modal container to become visible, returning as soon as it is
+            try:
+                self._modal_wait.until(lambda driver: self._is_modal_open())
+            except TimeoutException:
                 logger.warning(f"Modal not detected for deposit #{deposit['index']}")
-                time.sleep(CONFIG["MODAL_LOAD_DELAY"])  # Try waiting longer
             
             # Extract data from modal
             try:
-                # Bill payer
-                try:
-                    bill_payer_element = self.driver.find_element(
-                        By.CSS_SELECTOR, CONFIG["SELECTORS"]["MODAL"]["BILL_PAYER"]
-                    )
-                    detailed_deposit["billPayer"] = bill_payer_element.text.strip()
-                except NoSuchElementException:
-                    logger.debug(f"Bill payer element not found for deposit #{deposit['index']}")
-                
-                # Amount
-                try:
-                    amount_input = self.driver.find_element(
-                        By.CSS_SELECTOR, CONFIG["SELECTORS"]["MODAL"]["AMOUNT"]
-                    )
-                    detailed_deposit["formAmount"] = amount_input.get_attribute("value")
-                except NoSuchElementException:
-                    logger.debug(f"Amount input not found for deposit #{deposit['index']}")
-                
-                # Date
-                try:
-                    date_input = self.driver.find_element(
-                        By.CSS_SELECTOR, CONFIG["SELECTORS"]["MODAL"]["DATE"]
-                    )
-                    detailed_deposit["depositDate"] = date_input.get_attribute("value")
-                except NoSuchElementException:
-                    logger.debug(f"Date input not found for deposit #{deposit['index']}")
-                
-                # Note
-                try:
-                    note_textarea = self.driver.find_element(
-                        By.CSS_SELECTOR, CONFIG["SELECTORS"]["MODAL"]["NOTE"]
-                    )
-                    detailed_deposit["note"] = note_textarea.get_attribute("value")
-                except NoSuchElementException:
-                    logger.debug(f"Note textarea not found for deposit #{deposit['index']}")
-                
-                # Already paid
-                try:
-                    already_paid_checkbox = self.driver.find_element(
-                        By.CSS_SELECTOR, CONFIG["SELECTORS"]["MODAL"]["ALREADY_PAID"]
-                    )
-                    detailed_deposit["alreadyPaid"] = already_paid_checkbox.is_selected()
-                except NoSuchElementException:
-                    logger.debug(f"Already paid checkbox not found for deposit #{deposit['index']}")
+                self._apply_modal_values(detailed_deposit, self._extract_modal_js())
                 
             except Exception as e:
                 logger.error(f"Error extracting modal data for deposit #{deposit['index']}: {str(e)}")
                 detailed_deposit["errorMessage"] = f"Modal data extraction error: {str(e)}"
             
-            # Close modal
-            for selector in CONFIG["SELECTORS"]["MODAL"]["CLOSE_BUTTON"]:
-                try:
-                    close_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if close_button.is_displayed():
-                        close_button.click()
-                        logger.debug(f"Closed modal for deposit #{deposit['index']} with button")
-                        break
-                except:
-                    continue
-            
-            # Try ESC key if button click didn't work
+            # Close modal: click the first visible close button, else send ESC
             try:
-                # Check if modal is still open
-                is_modal_open = False
-                for selector in CONFIG["SELECTORS"]["MODAL"]["CONTAINER"]:
-                    try:
-                        modal = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if modal.is_displayed():
-                            is_modal_open = True
-                            break
-                    except:
-                        continue
-                
-                if is_modal_open:
-                    logger.debug(f"Using ESC key to close modal for deposit #{deposit['index']}")
-                    webdriver.ActionChains(self.driver).send_keys(webdriver.Keys.ESCAPE).perform()
-            except:
-                pass
+                closed_with = self._close_modal_js()
+                logger.debug(f"Closed modal for deposit #{deposit['index']} with {closed_with}")
+            except JavascriptException as e:
+                logger.debug(f"Close script failed for deposit #{deposit['index']}: {str(e)}")
+                # ESC only if a modal container is still in the DOM
+                if self.driver.find_elements(By.CSS_SELECTOR, self._sel_modal_joined):
+                    self.driver.switch_to.active_element.send_keys(Keys.ESCAPE)
             
             # Wait for modal to close
-            time.sleep(CONFIG["DELAY_BETWEEN_ACTIONS"])
+            try:
+                self._modal_wait.until_not(lambda driver: self._is_modal_open())
+            except TimeoutException:
+                logger.debug(f"Modal still visible after closing deposit #{deposit['index']}")
             
         except Exception as e:
             logger.error(f"Error processing deposit #{deposit['index']}: {str(e)}")
@@ -777,86 +1280,165 @@ class FamlyDepositExtractor:
         return detailed_deposit
     
     def extract_all_deposits(self):
-        """Extract detailed information for all deposits."""
+        """Extract detailed information for all deposits; returns the number of rows written."""
         if not self.deposits:
             logger.warning("No deposits found to extract details from")
-            return []
-            
+            return 0
+        
         logger.info(f"Extracting details for {len(self.deposits)} deposits...")
+        self._extract_modal_deposits(self.deposits)
         
-        self.extracted_data = []
+        logger.info(f"Extracted details for {len(self.deposits)} deposits")
+        return len(self.deposits)
+    
+    def _extract_modal_deposits(self, deposits):
+        """Run the per-deposit modal extraction, sharded across worker browsers when enabled.
         
-        # Use tqdm for a progress bar
-        for deposit in tqdm(self.deposits, desc="Extracting deposits"):
-            detailed_deposit = self.extract_deposit_details(deposit)
-            self.extracted_data.append(detailed_deposit)
+        Rows are written as they are produced, in completion order;
+        _close_csv sorts the finished file back into page order.
+        """
+        if self.workers > 1 and len(deposits) > 1 and self._credentials:
+            # Worker browsers stay open (and logged in) across children
+            if self._browser_pool is None:
+                # Log in once here; workers reuse this session instead of the login form
+                self._browser_pool = BrowserPool(
+                    self.workers, self.export_session(), self._credentials, self.remote_url
+                )
             
-            # Small delay to avoid overwhelming the page
-            time.sleep(CONFIG["DELAY_BETWEEN_ACTIONS"])
+            written = set()
+            try:
+                for rows in self._browser_pool.extract(self.child_id, deposits):
+                    for row in rows:
+                        self._write_row(row)
+                        written.add(row["index"])
+                return
+            except Exception as e:
+                logger.warning(f"Parallel extraction failed, continuing serially: {str(e)}")
+                deposits = [deposit for deposit in deposits if deposit["index"] not in written]
         
-        logger.info(f"Extracted details for {len(self.extracted_data)} deposits")
-        return self.extracted_data
+        for deposit in progress(deposits, "Extracting deposits"):
+            self._write_row(self.extract_deposit_details(deposit))
     
-    def export_to_csv(self, output_file):
-        """Export extracted data to CSV."""
-        logger.info(f"Exporting data to CSV: {output_file}")
+    def _open_csv(self, output_file, resume=False):
+        """Open output_file for per-row writing.
         
-        if not self.extracted_data:
-            logger.warning("No data to export")
-            return False
+        With resume, rows of an existing file that were extracted without
+        an errorMessage are kept and their deposit indices returned so they
+        can be skipped; failed rows are dropped so they get extracted again.
+        """
+        fieldnames = list(self._record_template)
+        kept = []
         
-        try:
-            # Convert to DataFrame for easy CSV export
-            df = pd.DataFrame(self.extracted_data)
-            
-            # Save to CSV
-            df.to_csv(output_file, index=False, quoting=csv.QUOTE_ALL)
-            
-            logger.info(f"Successfully exported {len(self.extracted_data)} deposits to {output_file}")
-            return True
+        if resume and os.path.exists(output_file):
+            with open(output_file, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames == fieldnames:
+                    kept = [row for row in reader if row.get("index") and not row.get("errorMessage")]
+                    logger.info(f"Resuming {output_file}: {len(kept)} deposits already exported")
+                else:
+                    logger.warning(f"Columns in {output_file} differ from this version, starting it over")
+        
+        # Rewrite the file so only the kept rows carry over from the previous run
+        self._csv_file = open(output_file, "w", newline="", encoding="utf-8")
+        self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
+        self._csv_writer.writeheader()
+        self._csv_writer.writerows(kept)
+        self._csv_file.flush()
+        self.exported_count = len(kept)
+        return {int(row["index"]) for row in kept}
+    
+    def _write_row(self, row):
+        """Append one extracted deposit to the open CSV."""
+        self._csv_writer.writerow(row)
+        # Flush so an interrupted run can be resumed from what is on disk
+        self._csv_file.flush()
+        self.exported_count += 1
+    
+    def _close_csv(self):
+        """Close the CSV opened by _open_csv and put its rows back in page order.
+        
+        Rows are appended in completion order (parallel workers, resumed
+        runs), so the finished file is rewritten sorted by index.
+        """
+        if self._csv_file:
+            output_file = self._csv_file.name
+            self._csv_file.close()
             
-        except Exception as e:
-            logger.error(f"Export failed: {str(e)}")
-            return False
+            with open(output_file, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames
+                rows = list(reader)
+            ordered = sorted(rows, key=lambda row: int(row["index"]))
+            if ordered != rows:
+                # Write beside the file and swap it in, so a crash never leaves a half-written CSV
+                tmp_file = output_file + ".tmp"
+                with open(tmp_file, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
+                    writer.writeheader()
+                    writer.writerows(ordered)
+                os.replace(tmp_file, output_file)
+        self._csv_file = None
+        self._csv_writer = None
     
     def cleanup(self):
         """Clean up resources."""
         logger.info("Cleaning up...")
         
+        if self._browser_pool:
+            self._browser_pool.close()
+            self._browser_pool = None
+        
         if self.driver:
             self.driver.quit()
             self.driver = None
         
         logger.info("Cleanup complete")
     
-    def run(self, username, password, child_id, output_file):
-        """Run the complete extraction process."""
+    def extract_child(self, child_id, output_file, resume=False):
+        """Extract deposits for one child using the current logged-in driver.
+        
+        Rows are streamed to output_file as they are extracted. With resume,
+        deposits already present in output_file are skipped.
+        """
+        # Reset per-child state
+        self.deposits = []
+        self.exported_count = 0
+        
+        # Navigate to child profile
+        if not self.navigate_to_child_profile(child_id):
+            return {"success": False, "child_id": child_id, "error": "Navigation to child profile failed"}
+        
+        # Find deposits
+        self.find_deposits()
+        if not self.deposits:
+            return {"success": False, "child_id": child_id, "error": "No deposits found"}
+        
+        logger.info(f"Exporting data to CSV: {output_file}")
+        done = self._open_csv(output_file, resume)
         try:
-            # Login
-            if not self.login(username, password):
-                return {"success": False, "error": "Login failed"}
-            
-            # Navigate to child profile
-            if not self.navigate_to_child_profile(child_id):
-                return {"success": False, "error": "Navigation to child profile failed"}
-            
-            # Find deposits
-            self.find_deposits()
-            if not self.deposits:
-                return {"success": False, "error": "No deposits found"}
+            self.deposits = [deposit for deposit in self.deposits if deposit["index"] not in done]
             
             # Extract deposit details
             self.extract_all_deposits()
+        finally:
+            self._close_csv()
+        
+        logger.info(f"Successfully exported {self.exported_count} deposits to {output_file}")
+        return {
+            "success": True,
+            "child_id": child_id,
+            "count": self.exported_count,
+            "output_file": output_file
+        }
+    
+    def run(self, username, password, child_id, output_file, resume=False):
+        """Run the complete extraction process."""
+        try:
+            # Login
+            if not self.login_or_resume(username, password, resume):
+                return {"success": False, "error": "Login failed"}
             
-            # Export to CSV
-            if not self.export_to_csv(output_file):
-                return {"success": False, "error": "Export failed"}
-            
-            return {
-                "success": True,
-                "count": len(self.extracted_data),
-                "output_file": output_file
-            }
+            return self.extract_child(child_id, output_file, resume)
             
         except Exception as e:
             logger.error(f"Extraction failed: {str(e)}")
@@ -864,6 +1446,142 @@ class FamlyDepositExtractor:
             
         finally:
             self.cleanup()
+    
+    def extract_many(self, username, password, child_ids, output_file, resume=False):
+        """Extract deposits for several children on one driver.
+        
+        The driver is recycled (quit, restarted and logged in again) every
+        DRIVER_RECYCLE_EVERY children, since long-lived sessions get slower.
+        Each child's CSV is named after output_file with the child ID appended.
+        """
+        base, ext = os.path.splitext(output_file)
+        results = []
+        try:
+            if not self.login_or_resume(username, password, resume):
+                return [{"success": False, "child_id": child_id, "error": "Login failed"} for child_id in child_ids]
+            
+            for i, child_id in enumerate(child_ids):
+                # Periodically recycle the browser session
+                if i and i % CONFIG["DRIVER_RECYCLE_EVERY"] == 0:
+                    logger.info(f"Recycling WebDriver after {i} children...")
+                    self.cleanup()
+                    self.setup_driver()
+                    if not self.login_or_resume(username, password, resume):
+                        results.extend(
+                            {"success": False, "child_id": remaining, "error": "Login failed"}
+                            for remaining in child_ids[i:]
+                        )
+                        break
+                
+                try:
+                    results.append(self.extract_child(child_id, base + "_" + str(child_id) + (ext or ".csv"), resume))
+                except Exception as e:
+                    logger.error(f"Extraction failed for child {child_id}: {str(e)}")
+                    results.append({"success": False, "child_id": child_id, "error": str(e)})
+            
+            return results
+            
+        finally:
+            self.cleanup()
+
+
+class BrowserPool:
+    """Headless worker browsers that share the parent's login and are reused across children.
+    
+    WebDriver sessions are not safe to share, so each worker extractor is
+    only ever used by one thread at a time.
+    """
+    
+    def __init__(self, size, session, credentials, remote_url=None):
+        """Initialize the pool; browsers are started lazily on first use."""
+        self.size = size
+        self.session = session
+        self.credentials = credentials
+        self.remote_url = remote_url
+        self._idle = queue.Queue()
+        self._extractors = []
+    
+    def _open_extractor(self):
+        """Start a headless extractor logged in with the shared session (or the login form)."""
+        extractor = FamlyDepositExtractor(headless=True, remote_url=self.remote_url)
+        try:
+            # The app leaves the login route asynchronously, so wait for it instead of reading the URL once
+            logged_in = extractor.restore_session(self.session) and extractor.is_logged_in(CONFIG["PAGE_LOAD_WAIT"])
+            if not logged_in:
+                logger.info("Shared session not accepted, logging in from worker...")
+                logged_in = extractor.login(*self.credentials)
+        except Exception:
+            extractor.cleanup()
+            raise
+        
+        if not logged_in:
+            extractor.cleanup()
+            raise RuntimeError("Worker browser could not log in")
+        
+        # Only usable (logged-in) browsers join the pool
+        self._extractors.append(extractor)
+        return extractor
+    
+    def _extract_chunk(self, child_id, deposits):
+        """Extract one shard of deposits on an idle (or newly started) worker browser."""
+        try:
+            extractor = self._idle.get_nowait()
+        except queue.Empty:
+            extractor = self._open_extractor()
+        
+        try:
+            # Only navigate when this worker is not already on the child's page
+            if extractor.child_id != child_id:
+                if not extractor.navigate_to_child_profile(child_id):
+                    extractor.child_id = None
+                    failed = []
+                    for deposit in deposits:
+                        detailed_deposit = extractor._new_detailed_deposit(deposit)
+                        detailed_deposit["errorMessage"] = "Worker could not open child profile"
+                        failed.append(detailed_deposit)
+                    return failed
+                
+                # Let the deposit list render before clicking rows
+                extractor.find_deposits()
+            
+            return [extractor.extract_deposit_details(deposit) for deposit in deposits]
+        finally:
+            self._idle.put(extractor)
+    
+    def extract(self, child_id, deposits):
+        """Shard deposits across the workers, yielding each shard's rows as it finishes."""
+        chunks = chunk_list(deposits, self.size)
+        logger.info(f"Extracting {len(deposits)} deposits across {len(chunks)} worker browsers...")
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [executor.submit(self._extract_chunk, child_id, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield future.result()
+    
+    def close(self):
+        """Quit every worker browser."""
+        for extractor in self._extractors:
+            extractor.cleanup()
+        self._extractors = []
+        self._idle = queue.Queue()
+
+
+def progress(items, desc):
+    """Iterate items with a tqdm bar on a terminal, or periodic log lines otherwise."""
+    if sys.stderr.isatty():
+        yield from tqdm(items, desc=desc, mininterval=1.0)
+        return
+    
+    total = len(items)
+    for i, item in enumerate(items, 1):
+        yield item
+        if i % CONFIG["PROGRESS_LOG_EVERY"] == 0 or i == total:
+            logger.info(f"{desc}: {i}/{total}")
+
+
+def chunk_list(items, count):
+    """Split items into at most count contiguous, roughly equal chunks."""
+    size = -(-len(items) // count)
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
 
 def main():
@@ -872,10 +1590,15 @@ def main():
     parser = argparse.ArgumentParser(description="Extract deposit information from Famly system")
     parser.add_argument("-u", "--username", help="Famly login email")
     parser.add_argument("-p", "--password", help="Famly login password")
-    parser.add_argument("-c", "--child-id", required=True, help="Child ID")
+    parser.add_argument("-c", "--child-id", required=True, nargs="+", help="Child ID (several IDs share one browser session)")
     parser.add_argument("-o", "--output", default="famly_deposits.csv", help="Output CSV file")
-    parser.add_argument("--headless", action="store_true", help="Run in headless mode")
+    parser.add_argument("--headless", dest="headless", action="store_true", default=True, help="Run in headless mode (default)")
+    parser.add_argument("--headed", dest="headless", action="store_false", help="Show the browser window")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--remote-url", default=os.environ.get(CONFIG["REMOTE_URL_ENV"]), help="Selenium server/Grid URL to run the browsers on")
+    parser.add_argument("--profile-dir", nargs="?", const=CONFIG["PROFILE_DIR"], help=f"Keep a Chrome profile between runs to skip logging in (default: {CONFIG['PROFILE_DIR']}); Chrome locks it, so one run at a time")
+    parser.add_argument("--resume", action="store_true", help="Reuse the saved login session, skip deposits already in the output CSV and append the rest")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Headless browsers used to extract deposit details in parallel")
     args = parser.parse_args()
     
     # Get credentials if not provided
@@ -889,16 +1612,34 @@ def main():
         password = getpass("Enter your Famly login password: ")
     
     # Create and run extractor
-    extractor = FamlyDepositExtractor(headless=args.headless, debug=args.debug)
-    result = extractor.run(username, password, args.child_id, args.output)
-    
-    if result["success"]:
-        print(f"\n✅ Extraction completed successfully!")
-        print(f"📄 {result['count']} deposits exported to {result['output_file']}")
-        return 0
-    else:
-        print(f"\n❌ Extraction failed: {result['error']}")
-        return 1
+    extractor = FamlyDepositExtractor(
+        headless=args.headless, debug=args.debug, workers=args.workers,
+        profile_dir=args.profile_dir or None, remote_url=args.remote_url
+    )
+    
+    if len(args.child_id) == 1:
+        result = extractor.run(username, password, args.child_id[0], args.output, args.resume)
+        
+        if result["success"]:
+            print(f"\n✅ Extraction completed successfully!")
+            print(f"📄 {result['count']} deposits exported to {result['output_file']}")
+            return 0
+        else:
+            print(f"\n❌ Extraction failed: {result['error']}")
+            return 1
+    
+    # Multiple children: one CSV per child, named after the --output file
+    results = extractor.extract_many(username, password, args.child_id, args.output, args.resume)
+    
+    failed = [r for r in results if not r["success"]]
+    for result in results:
+        if result["success"]:
+            print(f"📄 {result['count']} deposits for child {result['child_id']} exported to {result['output_file']}")
+        else:
+            print(f"❌ Child {result['child_id']}: {result['error']}")
+    
+    print(f"\n{'✅' if not failed else '⚠️'} Processed {len(results)} children, {len(failed)} failed")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 import os
 import sys
+import re
 import time
 import csv
+import glob
+import hashlib
 import json
 import argparse
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from getpass import getpass
-import pandas as pd
 from tqdm import tqdm
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -23,16 +31,26 @@ from webdriver_manager.chrome import ChromeDriverManager
 CONFIG = {
     "BASE_URL": "https://app.famly.co/#/login",
     "CHILD_PROFILE_URL_TEMPLATE": "https://app.famly.co/#/account/childProfile/{}/plansAndInvoices",
+    # One cookies_<hash of the username>.json per account, reused by --resume
+    "COOKIES_DIR": os.path.join(os.path.expanduser("~"), ".cache", "famly"),
+    "COOKIES_MAX_AGE": 12 * 3600,
     "USER": "wolketich",
     "TIMESTAMP": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    "BLOCKED_URLS": [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg",
+        "*.woff", "*.woff2",
+        "*intercom*", "*sentry*", "*google-analytics*", "*segment*"
+    ],
     "TIMEOUTS": {
         "DEFAULT": 25,
-        "PAGE_LOAD": 3,
+        "DEPOSITS_SECTION": 8,
         "LOGIN": 15,
+        "SESSION_CHECK": 10,
         "MODAL_APPEAR": 1.0,
         "MODAL_CLOSE": 0.5,
         "BETWEEN_ACTIONS": 0.3,
-        "BETWEEN_CHILDREN": 3.0
+        "BACKOFF_START": 0.1,
+        "BACKOFF_MAX": 5.0
     },
     "SELECTORS": {
         "LOGIN": {
@@ -40,11 +58,9 @@ CONFIG = {
             "PASSWORD_INPUT": 'input[type="password"]',
             "LOGIN_BUTTON": 'button[type="submit"]'
         },
-        "PAGE_READY": [
-            ".sc-beqWaB.bUiODS",
-            "h3",
-            "button"
-        ],
+        "DEPOSITS_SECTION": ".sc-beqWaB.bUiODS",
+        # Profile tab links carry the child's ID, so they only match once that child's view is rendered
+        "CHILD_SENTINEL": 'a[href*="/childProfile/{}/"]',
         "MODAL": {
             "CONTAINER": [
                 '[role="dialog"]', '.modal', 'form'
@@ -72,6 +88,81 @@ logging.basicConfig(
 )
 logger = logging.getLogger("FamlyExtractor")
 
+DEPOSITS_JS = """
+(function() {
+    function extractDeposits() {
+        const depositsSection = document.querySelector('.sc-beqWaB.bUiODS');
+        if (!depositsSection) return [];
+        const depositBlocks = depositsSection.querySelectorAll('.sc-beqWaB.sc-CQMxN.bUiODS');
+        const results = [];
+        for (let i = 0; i < depositBlocks.length; i++) {
+            const paragraphs = depositBlocks[i].getElementsByTagName('p');
+            const texts = [];
+            for (let j = 0; j < paragraphs.length; j++) {
+                const p = paragraphs[j];
+                const small = p.parentElement ? p.parentElement.querySelector('small') : null;
+                texts.push({
+                    text: p.textContent ? p.textContent.trim() : '',
+                    small: small ? small.textContent.trim() : null
+                });
+            }
+            results.push({ index: i + 1, paragraphs: texts });
+        }
+        return results;
+    }
+    try {
+        const deposits = extractDeposits();
+        return { success: true, deposits: deposits };
+    } catch (error) {
+        return { success: false, error: error.toString() };
+    }
+})()
+"""
+DEPOSITS_RETURN_JS = "return " + DEPOSITS_JS.strip()
+
+_AMOUNT_RE = re.compile(r'^[\d,.]+$')
+_CURRENCY = frozenset('€$£')
+
+def classify_deposit(block):
+    deposit = {
+        "index": block.get("index"),
+        "type": "Deposit",
+        "amount": "",
+        "currency": "",
+        "depositStatus": "",
+        "hasBeenReturned": False,
+        "returnStatus": ""
+    }
+    for paragraph in block.get("paragraphs", []):
+        text = paragraph.get("text", "")
+        small = paragraph.get("small")
+        if "Deposit" in text:
+            deposit["depositStatus"] = small or ""
+        if text in _CURRENCY:
+            deposit["currency"] = text
+        if _AMOUNT_RE.match(text):
+            deposit["amount"] = text
+        if "Return" in text and small is not None:
+            deposit["returnStatus"] = small
+            deposit["hasBeenReturned"] = small == "Invoiced"
+    return deposit
+
+def dumps_line(record):
+    if orjson:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE).decode()
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+_DRIVER_PATH = None
+_DRIVER_PATH_LOCK = threading.Lock()
+
+def get_driver_path():
+    global _DRIVER_PATH
+    with _DRIVER_PATH_LOCK:
+        if _DRIVER_PATH is None:
+            _DRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+            logger.info(f"Using chromedriver at {_DRIVER_PATH}")
+        return _DRIVER_PATH
+
 class FamlyDepositExtractor:
     def __init__(self, headless=False, debug=False, output_dir="output"):
         self.headless = headless and not debug
@@ -84,6 +175,11 @@ class FamlyDepositExtractor:
         self.driver = None
         self.deposits = []
         self.extracted_data = []
+        self.extractor_script_id = None
+        self.compile_supported = True
+        # Set after a full page load shows the child sentinel that hash switching waits on
+        self.route_switch = False
+        self.backoff = 0.0
         self.setup_driver()
 
     def setup_driver(self):
@@ -95,13 +191,34 @@ class FamlyDepositExtractor:
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--user-agent=Mozilla/5.0")
-        chrome_options.add_argument("--disable-animations")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-features=Translate,BackForwardCache,InterestCohort,AcceptCHFrame")
+        for flag in ("--disable-background-networking", "--disable-sync", "--disable-default-apps",
+                     "--disable-extensions", "--mute-audio", "--no-first-run", "--no-default-browser-check",
+                     "--disable-popup-blocking", "--disable-renderer-backgrounding"):
+            chrome_options.add_argument(flag)
+        # driver.get returns at DOMContentLoaded; the deposits-section wait covers the rest
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.set_capability('goog:loggingPrefs', {'browser': 'OFF', 'driver': 'OFF', 'performance': 'OFF'})
         if self.debug:
             chrome_options.add_argument("--auto-open-devtools-for-tabs")
-        service = Service(ChromeDriverManager().install())
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        service = Service(get_driver_path())
         self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.driver.maximize_window()
+        if self.debug and not self.headless:
+            self.driver.maximize_window()
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": CONFIG["BLOCKED_URLS"]})
+        except Exception as e:
+            logger.debug(f"Could not block asset requests: {str(e)}")
+        try:
+            self.driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+                "features": [{"name": "prefers-reduced-motion", "value": "reduce"}]})
+        except Exception as e:
+            logger.debug(f"Could not emulate reduced motion: {str(e)}")
         self.wait = WebDriverWait(self.driver, CONFIG["TIMEOUTS"]["DEFAULT"])
+        self.section_wait = WebDriverWait(self.driver, CONFIG["TIMEOUTS"]["DEPOSITS_SECTION"])
         logger.info("WebDriver setup complete")
 
     def login(self, username, password):
@@ -119,104 +236,167 @@ class FamlyDepositExtractor:
             login_button = self.driver.find_element(
                 By.CSS_SELECTOR, CONFIG["SELECTORS"]["LOGIN"]["LOGIN_BUTTON"])
             login_button.click()
-            self.wait.until(EC.url_changes(CONFIG["BASE_URL"]))
-            time.sleep(CONFIG["TIMEOUTS"]["LOGIN"])
+            WebDriverWait(self.driver, CONFIG["TIMEOUTS"]["LOGIN"]).until(EC.url_contains('/account'))
+            self.compile_extractor()
+            self.save_cookies(username)
             return True
         except Exception as e:
             logger.error(f"Login failed: {str(e)}")
             return False
 
+    def cookies_path(self, username):
+        digest = hashlib.sha256(username.strip().lower().encode()).hexdigest()[:16]
+        return os.path.join(CONFIG["COOKIES_DIR"], f"cookies_{digest}.json")
+
+    def save_cookies(self, username):
+        try:
+            os.makedirs(CONFIG["COOKIES_DIR"], exist_ok=True)
+            # Created owner-only from the start; these are live auth cookies
+            fd = os.open(self.cookies_path(username), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.driver.get_cookies(), f)
+        except Exception as e:
+            logger.debug(f"Could not save cookies: {str(e)}")
+
+    def resume_session(self, username):
+        path = self.cookies_path(username)
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) > CONFIG["COOKIES_MAX_AGE"]:
+            return False
+        try:
+            with open(path) as f:
+                cookies = json.load(f)
+        except ValueError:
+            return False
+        if not self.load_cookies(cookies):
+            logger.info("Saved session expired, logging in")
+            return False
+        logger.info("Resumed saved session")
+        return True
+
+    def load_cookies(self, cookies):
+        self.restore_cookies(cookies)
+        # Changing only the hash would not restart the app; reload so it boots with the cookies
+        self.driver.refresh()
+        # A logged-in app leaves the login route by itself
+        try:
+            WebDriverWait(self.driver, CONFIG["TIMEOUTS"]["SESSION_CHECK"]).until(EC.url_contains('/account'))
+        except TimeoutException:
+            return False
+        self.compile_extractor()
+        return True
+
+    def wait_for_section(self, selector):
+        try:
+            self.section_wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            return True
+        except TimeoutException:
+            return False
+
     def navigate_to_child_profile(self, child_id, child_name=""):
         try:
             url = CONFIG["CHILD_PROFILE_URL_TEMPLATE"].format(child_id)
+            section = CONFIG["SELECTORS"]["DEPOSITS_SECTION"]
+            sentinel = CONFIG["SELECTORS"]["CHILD_SENTINEL"].format(child_id)
+            current_url = self.driver.current_url
+            # The app is already booted: switch routes client-side instead of reloading the bundle
+            if self.route_switch and current_url.split('#')[0] == url.split('#')[0] and current_url != CONFIG["BASE_URL"]:
+                route = url.split('#', 1)[1]
+                self.driver.execute_script("window.location.hash = arguments[0];", route)
+                # The new child's view is up once the route matches and a link with its ID has rendered
+                switched_js = "return location.hash.startsWith('#' + arguments[0]) && !!document.querySelector(arguments[1])"
+                try:
+                    self.section_wait.until(lambda d: d.execute_script(
+                        switched_js + " && !!document.querySelector(arguments[2]);", route, sentinel, section))
+                    return True
+                except TimeoutException:
+                    pass
+                # The child rendered but has no deposits section; no reload needed
+                if self.driver.execute_script(switched_js + ";", route, sentinel):
+                    logger.warning(f"No deposits section for child {child_id} after {CONFIG['TIMEOUTS']['DEPOSITS_SECTION']}s")
+                    return True
+                logger.debug(f"Route change for child {child_id} did not render, reloading")
             self.driver.get(url)
-            time.sleep(CONFIG["TIMEOUTS"]["PAGE_LOAD"])
+            if not self.wait_for_section(section):
+                logger.warning(f"No deposits section for child {child_id} after {CONFIG['TIMEOUTS']['DEPOSITS_SECTION']}s")
+                return True
+            # Without the sentinel every switch would time out and reload, so keep to full page loads
+            self.route_switch = bool(self.driver.find_elements(By.CSS_SELECTOR, sentinel))
+            if not self.route_switch:
+                logger.debug("No child link on the profile page, switching children with full page loads")
             return True
         except Exception as e:
             logger.error(f"Navigation failed: {str(e)}")
             return False
 
-    def is_page_fully_loaded(self):
+    def count_throttled_responses(self):
         try:
-            ready_state = self.driver.execute_script("return document.readyState")
-            return ready_state == "complete"
-        except:
-            return False
+            return self.driver.execute_script("""
+                const throttled = performance.getEntriesByType('resource')
+                    .filter(e => e.responseStatus === 429 || e.responseStatus === 503).length;
+                performance.clearResourceTimings();
+                return throttled;
+            """) or 0
+        except Exception as e:
+            logger.debug(f"Could not read response statuses: {str(e)}")
+            return 0
+
+    def apply_backoff(self):
+        # AIMD: double the pause while the server answers 429/503, decay it back to zero once it stops
+        timeouts = CONFIG["TIMEOUTS"]
+        if self.count_throttled_responses():
+            backoff = min(max(self.backoff * 2, timeouts["BACKOFF_START"]), timeouts["BACKOFF_MAX"])
+        else:
+            backoff = self.backoff * 0.8
+            if backoff < timeouts["BACKOFF_START"]:
+                backoff = 0.0
+        if backoff != self.backoff:
+            logger.info(f"Backoff between children: {self.backoff:.2f}s -> {backoff:.2f}s")
+        self.backoff = backoff
+        if self.backoff:
+            time.sleep(self.backoff)
+
+    def compile_extractor(self):
+        if not self.compile_supported:
+            return
+        try:
+            response = self.driver.execute_cdp_cmd("Runtime.compileScript", {
+                "expression": DEPOSITS_JS,
+                "sourceURL": "extractor.js",
+                "persistScript": True
+            })
+            self.extractor_script_id = response.get("scriptId")
+        except Exception as e:
+            # No CDP on this driver; stop trying and use execute_script from now on
+            logger.debug(f"Could not compile extractor script: {str(e)}")
+            self.extractor_script_id = None
+            self.compile_supported = False
+
+    def run_extractor(self):
+        # The compiled script belongs to one execution context, so recompile once if a navigation dropped it
+        for attempt in range(2 if self.compile_supported else 0):
+            if not self.extractor_script_id:
+                self.compile_extractor()
+            if not self.extractor_script_id:
+                break
+            try:
+                response = self.driver.execute_cdp_cmd("Runtime.runScript", {
+                    "scriptId": self.extractor_script_id,
+                    "returnByValue": True,
+                    "awaitPromise": False
+                })
+                if "exceptionDetails" not in response:
+                    return response["result"].get("value")
+            except Exception as e:
+                logger.debug(f"Compiled extractor failed: {str(e)}")
+            self.extractor_script_id = None
+        return self.driver.execute_script(DEPOSITS_RETURN_JS)
 
     def find_deposits(self):
         logger.info("Finding deposits...")
-        max_wait = time.time() + 20
-        while not self.is_page_fully_loaded() and time.time() < max_wait:
-            time.sleep(1)
-        time.sleep(CONFIG["TIMEOUTS"]["BETWEEN_ACTIONS"])
         try:
-            script = """
-const extractorResult = (function() {
-    function querySelectorAll(selector, root = document) {
-        try {
-            return Array.from(root.querySelectorAll(selector));
-        } catch {
-            return [];
-        }
-    }
-    function elementContainsText(element, text) {
-        return element && element.textContent && element.textContent.trim().includes(text);
-    }
-    function extractDeposits() {
-        const depositsSection = document.querySelector('.sc-beqWaB.bUiODS');
-        if (!depositsSection) return [];
-        const depositBlocks = querySelectorAll('.sc-beqWaB.sc-CQMxN.bUiODS', depositsSection);
-        const results = [];
-        depositBlocks.forEach((block, index) => {
-            const paragraphs = querySelectorAll('p', block);
-            let depositAmount = '';
-            let depositCurrency = '';
-            let depositStatus = '';
-            let hasBeenReturned = false;
-            let returnStatus = '';
-            paragraphs.forEach(p => {
-                if (elementContainsText(p, 'Deposit')) {
-                    const small = p.parentElement ? p.parentElement.querySelector('small') : null;
-                    depositStatus = small ? small.textContent.trim() : '';
-                }
-                if (['€', '$', '£'].includes(p.textContent.trim())) {
-                    depositCurrency = p.textContent.trim();
-                }
-                if (/^[\\d,.]+$/.test(p.textContent.trim())) {
-                    depositAmount = p.textContent.trim();
-                }
-                if (elementContainsText(p, 'Return')) {
-                    const small = p.parentElement ? p.parentElement.querySelector('small') : null;
-                    if (small) {
-                        returnStatus = small.textContent.trim();
-                        hasBeenReturned = (returnStatus === 'Invoiced');
-                    }
-                }
-            });
-            results.push({
-                index: index + 1,
-                type: 'Deposit',
-                amount: depositAmount,
-                currency: depositCurrency,
-                depositStatus: depositStatus,
-                hasBeenReturned: hasBeenReturned,
-                returnStatus: returnStatus
-            });
-        });
-        return results;
-    }
-    try {
-        const deposits = extractDeposits();
-        return { success: true, deposits: deposits };
-    } catch (error) {
-        return { success: false, error: error.toString() };
-    }
-})();
-return extractorResult;
-            """
-            result = self.driver.execute_script(script)
+            result = self.run_extractor()
             if result.get('success'):
-                self.deposits = result.get('deposits', [])
+                self.deposits = [classify_deposit(block) for block in result.get('deposits', [])]
                 return self.deposits
             else:
                 logger.error(f"Error extracting deposits: {result.get('error')}")
@@ -225,35 +405,123 @@ return extractorResult;
             logger.error(f"Error running JS extractor: {str(e)}")
             return []
 
-    def batch_process(self, children_data):
-        results = []
+    def process_child(self, child):
+        logger.info(f"Processing {child.get('name')} ({child.get('child_id')})")
+        self.deposits = []
+        self.navigate_to_child_profile(child.get('child_id', ''))
+        deposits = self.find_deposits()
+        result = {
+            "child_name": child.get('name'),
+            "child_id": child.get('child_id'),
+            "deposits_found": len(deposits),
+            "deposits": deposits
+        }
+        self.apply_backoff()
+        return result
+
+    def batch_process(self, children_data, write_result):
+        count = 0
         for i, child in enumerate(children_data):
-            logger.info(f"Processing {child.get('name')} ({child.get('child_id')})")
-            self.deposits = []
-            self.navigate_to_child_profile(child.get('child_id', ''))
-            deposits = self.find_deposits()
-            results.append({
-                "child_name": child.get('name'),
-                "child_id": child.get('child_id'),
-                "deposits_found": len(deposits),
-                "deposits": deposits
-            })
-            time.sleep(CONFIG["TIMEOUTS"]["BETWEEN_CHILDREN"])
-        return results
+            write_result(self.process_child(child))
+            count += 1
+        return count
+
+    def restore_cookies(self, cookies):
+        self.driver.get(CONFIG["BASE_URL"])
+        for cookie in cookies:
+            try:
+                self.driver.add_cookie(cookie)
+            except Exception as e:
+                logger.debug(f"Skipping cookie {cookie.get('name')}: {str(e)}")
+
+    def batch_process_parallel(self, children_data, workers, write_result):
+        # This extractor is already logged in; extra workers reuse its cookies instead of logging in again
+        cookies = self.driver.get_cookies()
+        local = threading.local()
+        lock = threading.Lock()
+        extractors = []
+        count = 0
+
+        def get_extractor():
+            if not hasattr(local, "extractor"):
+                with lock:
+                    extractor = None if self in extractors else self
+                    if extractor:
+                        extractors.append(extractor)
+                if not extractor:
+                    extractor = FamlyDepositExtractor(self.headless, self.debug, self.output_dir)
+                    # Registered first, so the finally below quits its browser whatever happens next
+                    with lock:
+                        extractors.append(extractor)
+                    if not extractor.load_cookies(cookies):
+                        extractor.cleanup()
+                        raise RuntimeError("Worker browser is not logged in with the shared cookies")
+                local.extractor = extractor
+            return local.extractor
+
+        def work(child):
+            return get_extractor().process_child(child)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(work, child): child for child in children_data}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        child = futures[future]
+                        logger.error(f"Worker failed on {child.get('name')} ({child.get('child_id')}): {str(e)}")
+                        # Recorded so the output shows the gap instead of looking complete
+                        result = {"child_name": child.get('name'), "child_id": child.get('child_id'), "error": str(e)}
+                    with lock:
+                        write_result(result)
+                        count += 1
+        finally:
+            for extractor in extractors:
+                if extractor is not self:
+                    extractor.cleanup()
+        return count
 
     def cleanup(self):
         if self.driver:
             self.driver.quit()
             self.driver = None
 
-    def run_batch(self, username, password, input_file):
+    def completed_child_ids(self, output_file):
+        done = set()
+        if not os.path.exists(output_file):
+            return done
+        with open(output_file) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                # Children whose worker failed are retried
+                if "error" not in record:
+                    done.add(str(record.get('child_id')))
+        return done
+
+    def run_batch(self, username, password, input_file, output_file, workers=1, resume=False):
         try:
-            children_df = pd.read_csv(input_file)
-            children_data = children_df.to_dict('records')
-            if not self.login(username, password):
+            with open(input_file, newline='') as fh:
+                children_data = list(csv.DictReader(fh))
+            if resume:
+                done = self.completed_child_ids(output_file)
+                children_data = [c for c in children_data if str(c.get('child_id')) not in done]
+                logger.info(f"Resuming: {len(done)} children already done, {len(children_data)} left")
+            # Saved cookies are only reused when resuming, and only for the same account
+            if not (resume and self.resume_session(username)) and not self.login(username, password):
                 logger.error("Login failed")
                 return
-            return self.batch_process(children_data)
+            # One compact JSON line per child, flushed immediately so a crash keeps everything written so far
+            with open(output_file, "a" if resume else "w") as f:
+                def write_result(result):
+                    f.write(dumps_line(result))
+                    f.flush()
+                if workers > 1:
+                    return self.batch_process_parallel(children_data, workers, write_result)
+                return self.batch_process(children_data, write_result)
         finally:
             self.cleanup()
 
@@ -264,20 +532,31 @@ def main():
     parser.add_argument("-i", "--input", required=True, help="Input CSV file")
     parser.add_argument("--headless", action="store_true", help="Run headless")
     parser.add_argument("--debug", action="store_true", help="Debug mode")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Parallel browser sessions")
+    parser.add_argument("-o", "--output", help="Output JSONL file")
+    parser.add_argument("--resume", action="store_true", help="Skip children already in the output file (default: newest output/batch_results_*.jsonl) and reuse the saved login")
     args = parser.parse_args()
 
     username = args.username or input("Famly email: ")
     password = args.password or getpass("Famly password: ")
 
+    out_file = args.output
+    if not out_file and args.resume:
+        # Without -o, resume the most recent run rather than a fresh timestamped file
+        previous = sorted(glob.glob(os.path.join("output", "batch_results_*.jsonl")))
+        if previous:
+            out_file = previous[-1]
+            logger.info(f"Resuming {out_file}")
+        else:
+            logger.warning("No earlier batch_results_*.jsonl in output/, starting a new run")
+    out_file = out_file or os.path.join("output", f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    os.makedirs(os.path.dirname(out_file) or ".", exist_ok=True)
+
     extractor = FamlyDepositExtractor(headless=args.headless, debug=args.debug)
-    results = extractor.run_batch(username, password, args.input)
-
-    if results:
-        out_file = os.path.join("output", f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-        os.makedirs("output", exist_ok=True)
-        with open(out_file, "w") as f:
-            json.dump(results, f, indent=2)
-        print(f"✅ Batch completed. Results saved to {out_file}")
+    count = extractor.run_batch(username, password, args.input, out_file, args.workers, args.resume)
+
+    if count:
+        print(f"✅ Batch completed. {count} results saved to {out_file}")
 
 if __name__ == "__main__":
     sys.exit(main())